@@ -0,0 +1,35 @@
+"""Require exactly one owner per image
+
+Revision ID: 3d9f2b6a8e41
+Revises: c5d81e37f9a2
+Create Date: 2026-10-14 19:15:43.207719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9f2b6a8e41'
+down_revision: Union[str, Sequence[str], None] = 'c5d81e37f9a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OWNER_COLUMNS = ('itinerary_id', 'itinerary_day_id', 'map_id', 'hotel_detail_id')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.create_check_constraint(
+            'ck_images_one_owner',
+            " + ".join(f"(CASE WHEN {column} IS NOT NULL THEN 1 ELSE 0 END)" for column in OWNER_COLUMNS) + " = 1",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_constraint('ck_images_one_owner', type_='check')
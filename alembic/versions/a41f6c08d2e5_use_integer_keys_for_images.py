@@ -0,0 +1,92 @@
+"""Use integer primary keys for images and image links
+
+Revision ID: a41f6c08d2e5
+Revises: 7c2e9a4d1b3f
+Create Date: 2026-10-14 19:12:40.528016
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f6c08d2e5'
+down_revision: Union[str, Sequence[str], None] = '7c2e9a4d1b3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # New images table keeps the old string ID alongside so links can be remapped
+    op.create_table(
+        'images_new',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('public_id', sa.String(), nullable=False),
+        sa.Column('legacy_id', sa.String(), nullable=True),
+    )
+    op.execute(
+        "INSERT INTO images_new (url, public_id, legacy_id) "
+        "SELECT url, public_id, id FROM images ORDER BY rowid"
+    )
+
+    op.create_table(
+        'image_links_new',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('image_id', sa.Integer(), sa.ForeignKey('images.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.String(), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO image_links_new (image_id, entity_type, entity_id) "
+        "SELECT images_new.id, image_links.entity_type, image_links.entity_id "
+        "FROM image_links JOIN images_new ON images_new.legacy_id = image_links.image_id"
+    )
+
+    op.drop_table('image_links')
+    op.drop_table('images')
+    op.rename_table('images_new', 'images')
+    op.rename_table('image_links_new', 'image_links')
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_column('legacy_id')
+    op.create_index('ix_imagelink_entity', 'image_links', ['entity_type', 'entity_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_imagelink_entity', table_name='image_links')
+
+    op.create_table(
+        'images_old',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('public_id', sa.String(), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO images_old (id, url, public_id) "
+        "SELECT printf('IMG-%08X', id), url, public_id FROM images"
+    )
+
+    op.create_table(
+        'image_links_old',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('image_id', sa.String(), sa.ForeignKey('images.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.String(), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO image_links_old (id, image_id, entity_type, entity_id) "
+        "SELECT printf('IMGLNK-%08X', id), printf('IMG-%08X', image_id), entity_type, entity_id "
+        "FROM image_links"
+    )
+
+    op.drop_table('image_links')
+    op.drop_table('images')
+    op.rename_table('images_old', 'images')
+    op.rename_table('image_links_old', 'image_links')
+    op.create_index(op.f('ix_images_id'), 'images', ['id'], unique=True)
+    op.create_index(op.f('ix_image_links_id'), 'image_links', ['id'], unique=True)
+    op.create_index('ix_imagelink_entity', 'image_links', ['entity_type', 'entity_id'], unique=False)
@@ -0,0 +1,87 @@
+"""Replace polymorphic image links with owner foreign keys on images
+
+Revision ID: c5d81e37f9a2
+Revises: a41f6c08d2e5
+Create Date: 2026-10-14 19:15:11.902344
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d81e37f9a2'
+down_revision: Union[str, Sequence[str], None] = 'a41f6c08d2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# image_links.entity_type -> (owner column on images, owner table)
+OWNERS = {
+    'itinerary': ('itinerary_id', 'itineraries'),
+    'itinerary_day': ('itinerary_day_id', 'itinerary_days'),
+    'map': ('map_id', 'maps'),
+    'hotel_detail': ('hotel_detail_id', 'hotel_details'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('images') as batch_op:
+        for column, table in OWNERS.values():
+            batch_op.add_column(sa.Column(column, sa.String(), nullable=True))
+            batch_op.create_foreign_key(
+                f'fk_images_{column}_{table}', table, [column], ['id'], ondelete='CASCADE'
+            )
+            batch_op.create_index(f'ix_images_{column}', [column], unique=False)
+
+    # Deleting an owner never removed its links, so only copy links whose
+    # owner row still exists; anything else would violate the new foreign keys
+    for entity_type, (column, table) in OWNERS.items():
+        op.execute(
+            f"UPDATE images SET {column} = ("
+            "SELECT entity_id FROM image_links "
+            f"WHERE image_links.image_id = images.id AND image_links.entity_type = '{entity_type}' "
+            f"AND EXISTS (SELECT 1 FROM {table} WHERE {table}.id = image_links.entity_id) "
+            "LIMIT 1"
+            ")"
+        )
+
+    # Images left without an owner can never be reached again. Log their
+    # Cloudinary IDs so the assets can be cleaned up, then drop the rows.
+    no_owner = " AND ".join(f"{column} IS NULL" for column, _ in OWNERS.values())
+    orphans = op.get_bind().execute(sa.text(f"SELECT public_id FROM images WHERE {no_owner}")).scalars().all()
+    if orphans:
+        logger.warning(f"Deleting {len(orphans)} images with no owner; Cloudinary public IDs: {orphans}")
+        op.execute(f"DELETE FROM images WHERE {no_owner}")
+
+    op.drop_index('ix_imagelink_entity', table_name='image_links')
+    op.drop_table('image_links')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table(
+        'image_links',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('image_id', sa.Integer(), sa.ForeignKey('images.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.String(), nullable=False),
+    )
+    op.create_index('ix_imagelink_entity', 'image_links', ['entity_type', 'entity_id'], unique=False)
+
+    for entity_type, (column, _) in OWNERS.items():
+        op.execute(
+            "INSERT INTO image_links (image_id, entity_type, entity_id) "
+            f"SELECT id, '{entity_type}', {column} FROM images WHERE {column} IS NOT NULL"
+        )
+
+    with op.batch_alter_table('images') as batch_op:
+        for column, table in OWNERS.values():
+            batch_op.drop_index(f'ix_images_{column}')
+            batch_op.drop_constraint(f'fk_images_{column}_{table}', type_='foreignkey')
+            batch_op.drop_column(column)
@@ -0,0 +1,56 @@
+"""Let the database fill in itineraries.created_at in UTC
+
+Revision ID: e8b3f71c4a90
+Revises: 3d9f2b6a8e41
+Create Date: 2026-10-14 19:31:47.520913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3f71c4a90'
+down_revision: Union[str, Sequence[str], None] = '3d9f2b6a8e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Millisecond-resolution UTC timestamp; CURRENT_TIMESTAMP only has whole seconds
+CREATED_AT_DEFAULT = sa.text("(STRFTIME('%Y-%m-%d %H:%M:%f', 'now'))")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('itineraries') as batch_op:
+        batch_op.alter_column(
+            'created_at',
+            existing_type=sa.DateTime(),
+            server_default=CREATED_AT_DEFAULT,
+        )
+
+    # Rows written by the old datetime.now default hold local time; move them
+    # to UTC so they sort alongside rows the database stamps from now on
+    op.execute(
+        "UPDATE itineraries "
+        "SET created_at = STRFTIME('%Y-%m-%d %H:%M:%f', created_at, 'utc') "
+        "WHERE created_at IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "UPDATE itineraries "
+        "SET created_at = STRFTIME('%Y-%m-%d %H:%M:%f', created_at, 'localtime') "
+        "WHERE created_at IS NOT NULL"
+    )
+
+    with op.batch_alter_table('itineraries') as batch_op:
+        batch_op.alter_column(
+            'created_at',
+            existing_type=sa.DateTime(),
+            server_default=None,
+        )
@@ -1,14 +1,53 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from models import Base
 
 DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=5,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
+
+# Applied once per new DBAPI connection; pooled connections keep them.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
+)
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+# Shared factory for request sessions. No handler queries pending objects:
+# the create path flushes explicitly before inserting images against the new
+# IDs, and the only attributes read after commit (id, slug) are set during
+# that flush, so both autoflush and expire-on-commit are off.
+SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 def initialize_database():
     Base.metadata.create_all(bind=engine)
 
+def optimize_database():
+    # Let SQLite refresh planner statistics for the indexes it has been using
+    with engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA optimize")
+
 def get_session():
-    with Session(engine) as session:
+    with SessionLocal() as session:
         yield session
\ No newline at end of file
@@ -1,13 +1,17 @@
+import asyncio
+import hashlib
 import os
-from typing import Annotated, List, Protocol, Sequence
-from fastapi import Depends, HTTPException, status
-from pydantic import BaseModel
+from typing import Annotated, Protocol, Sequence
+from fastapi import Depends
 from database import get_session
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 import cloudinary
+import cloudinary.api
+from cachetools import TTLCache
 
-from itinerary.schema import ImageCreateSchema
-from models import Image, ImageLink
+from models import Image, Itinerary
+from services.logger import logger
 
 db_dependency = Annotated[Session, Depends(get_session)]
 
@@ -23,17 +27,132 @@ class ImageLike(Protocol):
     url: str
     public_id: str
 
-def add_images_with_links(db: Session, images: Sequence[ImageLike] | None, entity_type: str, entity_id: str):
+# Every image row carries all four owner keys so a whole create fits one
+# executemany with a single parameter shape.
+_NO_IMAGE_OWNER = {"itinerary_id": None, "itinerary_day_id": None, "map_id": None, "hotel_detail_id": None}
+
+def image_rows(images: Sequence[ImageLike] | None, **owner: str) -> list[dict]:
+    """
+    Build insert rows for an entity's images, tagged with the owner's foreign
+    key, e.g. image_rows(day.images, itinerary_day_id=day_obj.id).
+    """
+    return [{**_NO_IMAGE_OWNER, "url": img.url, "public_id": img.public_id, **owner} for img in images or []]
+
+def insert_images(db: Session, rows: list[dict]):
+    """
+    Insert collected image rows with a single executemany. This is a Core
+    insert against the table: nothing reads the generated keys back, so no
+    per-row INSERT ... RETURNING is needed, and None owner keys are kept
+    instead of splitting the rows by key set as the ORM bulk path does.
+    """
+    if rows:
+        db.execute(insert(Image.__table__), rows)
+
+# Total itinerary count, refreshed at most once per minute so paginated
+# listings don't pay for a COUNT(*) on every request.
+_itinerary_count: TTLCache = TTLCache(maxsize=1, ttl=60)
+
+def count_itineraries(db: Session) -> int:
+    """
+    Return the cached number of itineraries, re-counting once the cache expires.
+    """
+    total = _itinerary_count.get("total")
+    if total is None:
+        total = db.scalar(select(func.count()).select_from(Itinerary))
+        _itinerary_count["total"] = total
+    return total
+
+def invalidate_itinerary_count():
+    """
+    Drop the cached itinerary count after itineraries are created or deleted.
+    """
+    _itinerary_count.clear()
+
+# Serialized itinerary detail responses keyed by slug: (JSON bytes, ETag).
+_itinerary_responses: TTLCache = TTLCache(maxsize=512, ttl=60)
+
+def get_cached_itinerary(slug: str) -> tuple[bytes, str] | None:
+    """
+    Return the cached (body, etag) pair for a slug, if still fresh.
+    """
+    return _itinerary_responses.get(slug)
+
+def cache_itinerary(slug: str, body: bytes) -> tuple[bytes, str]:
+    """
+    Store a serialized itinerary together with a weak ETag derived from its bytes.
+    """
+    entry = (body, f'W/"{hashlib.sha1(body).hexdigest()}"')
+    _itinerary_responses[slug] = entry
+    return entry
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag, using weak comparison.
+    The header may list several ETags separated by commas, or be "*".
+    """
+    if not if_none_match:
+        return False
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+    return False
+
+def invalidate_cached_itinerary(slug: str):
+    """
+    Forget the cached response for a slug after the itinerary changes.
+    """
+    _itinerary_responses.pop(slug, None)
+
+# Cloudinary's delete_resources accepts at most 100 public IDs per call.
+CLOUDINARY_DELETE_BATCH_SIZE = 100
+CLOUDINARY_DELETE_ATTEMPTS = 3
+
+def collect_public_ids(itinerary: Itinerary) -> list[str]:
+    """
+    Gather the Cloudinary public IDs of every image attached to an itinerary,
+    its map, its days and their hotels.
+    """
+    images = list(itinerary.images)
+    if itinerary.map and itinerary.map.image:
+        images.append(itinerary.map.image)
+    for day in itinerary.days:
+        images.extend(day.images)
+        if day.hotel_detail:
+            images.extend(day.hotel_detail.images)
+    # dict.fromkeys de-duplicates while keeping order, so a reused asset
+    # doesn't take up two slots in a delete_resources batch
+    return list(dict.fromkeys(img.public_id for img in images if img and img.public_id))
+
+def _batched(items: list[str], size: int) -> list[list[str]]:
+    """
+    Split items into consecutive lists of at most size elements
+    (itertools.batched is only available from Python 3.12).
+    """
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+async def _delete_cloudinary_batch(batch: list[str]):
+    """
+    Delete one batch of images from Cloudinary, retrying with backoff.
+    """
+    for attempt in range(1, CLOUDINARY_DELETE_ATTEMPTS + 1):
+        try:
+            result = await asyncio.to_thread(cloudinary.api.delete_resources, batch, resource_type="image")
+            logger.info(f"Deleted Cloudinary images {batch}: {result}")
+            return
+        except Exception as e:
+            logger.warning(f"Cloudinary deletion attempt {attempt} failed for {batch}: {str(e)}")
+            if attempt < CLOUDINARY_DELETE_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+    logger.error(f"Giving up on Cloudinary deletion for {batch}")
+
+async def delete_cloudinary_images(public_ids: list[str]):
     """
-    Create Image objects and link them to an entity using ImageLink.
+    Delete images from Cloudinary in batches, sending the batches concurrently
+    from worker threads so the event loop isn't blocked on HTTPS round-trips.
+    Meant to run as a background task once the database delete has committed.
     """
-    for img in images or []:
-        image_obj = Image(url=img.url, public_id=img.public_id)
-        db.add(image_obj)
-        db.flush()  
-        link = ImageLink(
-            image_id=image_obj.id,
-            entity_type=entity_type,
-            entity_id=entity_id
-        )
-        db.add(link)
\ No newline at end of file
+    await asyncio.gather(
+        *(_delete_cloudinary_batch(batch) for batch in _batched(public_ids, CLOUDINARY_DELETE_BATCH_SIZE))
+    )
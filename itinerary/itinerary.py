@@ -1,13 +1,29 @@
-import cloudinary
-import cloudinary.uploader
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Query, Response, status
 
 from pydantic import ValidationError
-from itinerary.schema import ItinerariesResponseSchema, ItineraryCreateSchema, ItinerarySchema
-from models import HotelDetail, Itinerary, ItineraryDay, Map, Tag
-from functions import add_images_with_links, db_dependency
-from sqlalchemy.orm import selectinload
+from itinerary.schema import (
+    ITINERARIES_RESPONSE_ADAPTER,
+    ITINERARY_ADAPTER,
+    ItinerariesResponseSchema,
+    ItineraryCreateSchema,
+    ItinerarySchema,
+)
+from models import HotelDetail, Image, Itinerary, ItineraryDay, Map, Tag
+from functions import (
+    cache_itinerary,
+    collect_public_ids,
+    count_itineraries,
+    db_dependency,
+    delete_cloudinary_images,
+    etag_matches,
+    get_cached_itinerary,
+    image_rows,
+    insert_images,
+    invalidate_cached_itinerary,
+    invalidate_itinerary_count,
+)
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, load_only, raiseload, selectinload, undefer
 from sqlalchemy.exc import SQLAlchemyError
 from services.logger import logger
 
@@ -16,29 +32,57 @@ router = APIRouter(
     tags=["Itineraries"],
 )
 
-@router.get("/", response_model=ItinerariesResponseSchema)
-async def get_itineraries(db: db_dependency):
+@router.get(
+    "/",
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": ItinerariesResponseSchema}},
+)
+async def get_itineraries(
+    db: db_dependency,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
     try:
-        itineraries = (
-            db.query(Itinerary)
-            .options(
-                selectinload(Itinerary.images),
-                selectinload(Itinerary.days)
-                    .selectinload(ItineraryDay.images),
-                selectinload(Itinerary.days)
-                    .selectinload(ItineraryDay.hotel_detail)
-                    .selectinload(HotelDetail.images),
-                selectinload(Itinerary.map)
-                    .selectinload(Map.image),
-                selectinload(Itinerary.tags)
+        # Only the card fields plus one cover image per itinerary; the full
+        # tree is served by the detail endpoint. The cover is the first image
+        # attached, i.e. the one with the lowest id.
+        cover_image_url = (
+            select(Image.url)
+            .where(Image.itinerary_id == Itinerary.id)
+            .order_by(Image.id)
+            .limit(1)
+            .correlate(Itinerary)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                Itinerary.id,
+                Itinerary.title,
+                Itinerary.slug,
+                Itinerary.duration,
+                Itinerary.location,
+                Itinerary.price,
+                Itinerary.discount,
+                cover_image_url.label("cover_image_url"),
+                Itinerary.created_at,
             )
-            .all()
+            # id breaks ties so LIMIT/OFFSET pages never overlap or skip rows
+            .order_by(Itinerary.created_at.desc(), Itinerary.id.desc())
+            .limit(limit)
+            .offset(offset)
         )
+        # Plain column rows: no ORM entities, and each card is just a dict
+        itineraries = [dict(row) for row in db.execute(stmt).mappings()]
 
-        return ItinerariesResponseSchema(
-            itineraries=[ItinerarySchema.model_validate(item) for item in itineraries],
-            total=len(itineraries)
+        # Rows come straight from typed columns, so build the page without
+        # re-validating it and let pydantic-core serialize it to bytes
+        page = ItinerariesResponseSchema.model_construct(
+            itineraries=itineraries,
+            total=count_itineraries(db),
+            limit=limit,
+            offset=offset,
         )
+        return Response(content=ITINERARIES_RESPONSE_ADAPTER.dump_json(page), media_type="application/json")
     
     except SQLAlchemyError as e:
     # Database-specific errors
@@ -62,36 +106,30 @@ async def get_itineraries(db: db_dependency):
             detail=f"An unexpected error occurred: {str(e)}"
         )
     
-@router.get("/{slug}", response_model=ItinerarySchema)
-async def get_itinerary(slug: str, db: db_dependency):
+@router.get(
+    "/{slug}",
+    response_class=Response,
+    responses={status.HTTP_200_OK: {"model": ItinerarySchema}},
+)
+async def get_itinerary(
+    slug: str,
+    db: db_dependency,
+    if_none_match: str | None = Header(None),
+):
     try:
-        logger.info(f"Fetching itinerary with slug: {slug}")
-        itinerary = (
-            db.query(Itinerary)
-            .options(
-                selectinload(Itinerary.images),
-                selectinload(Itinerary.days)
-                    .selectinload(ItineraryDay.images),
-                selectinload(Itinerary.days)
-                    .selectinload(ItineraryDay.hotel_detail)
-                    .selectinload(HotelDetail.images),
-                selectinload(Itinerary.map)
-                    .selectinload(Map.image),
-                selectinload(Itinerary.tags)
-            )
-            .filter(Itinerary.slug == slug)
-            .first()
-        )
+        cached = get_cached_itinerary(slug)
+        if cached is None:
+            cached = cache_itinerary(slug, _load_itinerary_json(db, slug))
+        body, etag = cached
 
-        if not itinerary:
-            logger.warning(f"Itinerary with slug '{slug}' not found.")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Itinerary not found"
-            )
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    except HTTPException:
+        raise
 
-        return ItinerarySchema.model_validate(itinerary)
-    
     except SQLAlchemyError as e:
     # Database-specific errors
         logger.error(f"Database error occurred: {str(e)}")
@@ -113,9 +151,50 @@ async def get_itinerary(slug: str, db: db_dependency):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
         )
+
+def _load_itinerary_json(db: Session, slug: str) -> bytes:
+    """
+    Load an itinerary tree by slug and serialize it to JSON bytes.
+    """
+    logger.info(f"Fetching itinerary with slug: {slug}")
+    stmt = (
+        select(Itinerary)
+        .options(
+            # Deferred on the model for every other query
+            undefer(Itinerary.overview),
+            undefer(Itinerary.cost_inclusive),
+            undefer(Itinerary.cost_exclusive),
+            # Scalar relationships are JOINed in; each collection gets one
+            # selectinload query, since JOINing sibling collections multiplies
+            # rows (images x days x day images x hotel images x tags)
+            joinedload(Itinerary.map)
+                .joinedload(Map.image),
+            selectinload(Itinerary.images),
+            selectinload(Itinerary.days)
+                .selectinload(ItineraryDay.images),
+            selectinload(Itinerary.days)
+                .joinedload(ItineraryDay.hotel_detail)
+                .selectinload(HotelDetail.images),
+            selectinload(Itinerary.tags),
+            # Anything not loaded above raises instead of lazy loading
+            # per row while the schema walks the tree
+            raiseload("*"),
+        )
+        .where(Itinerary.slug == slug)
+    )
+    itinerary = db.scalars(stmt).first()
+
+    if not itinerary:
+        logger.warning(f"Itinerary with slug '{slug}' not found.")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Itinerary not found"
+        )
+
+    return ITINERARY_ADAPTER.dump_json(ItinerarySchema.from_orm_fast(itinerary))
     
 @router.delete("/{slug}", status_code=status.HTTP_200_OK)
-async def delete_itinerary(slug: str, db: db_dependency):
+async def delete_itinerary(slug: str, db: db_dependency, background_tasks: BackgroundTasks):
     if not slug:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -123,21 +202,27 @@ async def delete_itinerary(slug: str, db: db_dependency):
         )
 
     try:
-        # Fetch itinerary with all related images
-        itinerary = (
-            db.query(Itinerary)
+        # Fetch itinerary with all related images. Only what's read before the
+        # delete is hydrated: the title for the log/response, image public IDs,
+        # and the primary/foreign keys the delete-orphan cascade works from
+        # (leaving those out makes the flush lazy-load them back).
+        stmt = (
+            select(Itinerary)
             .options(
-                selectinload(Itinerary.images),
-                selectinload(Itinerary.tags),
-                selectinload(Itinerary.map).selectinload(Map.image),
-                selectinload(Itinerary.days).selectinload(ItineraryDay.images),
+                load_only(Itinerary.id, Itinerary.title, Itinerary.slug),
+                joinedload(Itinerary.map).load_only(Map.itinerary_id)
+                    .joinedload(Map.image).load_only(Image.public_id, Image.map_id),
+                selectinload(Itinerary.images).load_only(Image.public_id, Image.itinerary_id),
+                selectinload(Itinerary.tags).load_only(Tag.itinerary_id),
+                selectinload(Itinerary.days).load_only(ItineraryDay.itinerary_id)
+                    .selectinload(ItineraryDay.images).load_only(Image.public_id, Image.itinerary_day_id),
                 selectinload(Itinerary.days)
-                    .selectinload(ItineraryDay.hotel_detail)
-                    .selectinload(HotelDetail.images),
+                    .joinedload(ItineraryDay.hotel_detail).load_only(HotelDetail.day_id)
+                    .selectinload(HotelDetail.images).load_only(Image.public_id, Image.hotel_detail_id),
             )
-            .filter(Itinerary.slug == slug)
-            .first()
+            .where(Itinerary.slug == slug)
         )
+        itinerary = db.scalars(stmt).first()
 
         if not itinerary:
             logger.warning(f"Itinerary with slug '{slug}' not found for deletion.")
@@ -150,47 +235,19 @@ async def delete_itinerary(slug: str, db: db_dependency):
         itinerary_id = itinerary.id
         logger.info(f"Deleting itinerary '{title}' (slug: {slug}, ID: {itinerary_id})")
 
-        # -------------------------------
-        # Delete all images from Cloudinary
-        # -------------------------------
-        try:
-            # Itinerary images
-            for img in itinerary.images:
-                if img and img.public_id:
-                    result = cloudinary.uploader.destroy(img.public_id, resource_type="image")
-                    logger.info(f"Deleted itinerary image {img.public_id}: {result}")
-
-            # Map image (single image, not a list)
-            if itinerary.map and itinerary.map.image:
-                img = itinerary.map.image
-                if img.public_id:
-                    result = cloudinary.uploader.destroy(img.public_id, resource_type="image")
-                    logger.info(f"Deleted map image {img.public_id}: {result}")
-
-            # Day images and hotel images
-            for day in itinerary.days:
-                # Day images
-                for img in day.images:
-                    if img and img.public_id:
-                        result = cloudinary.uploader.destroy(img.public_id, resource_type="image")
-                        logger.info(f"Deleted day image {img.public_id}: {result}")
-
-                # Hotel images
-                if day.hotel_detail:
-                    for img in day.hotel_detail.images:
-                        if img and img.public_id:
-                            result = cloudinary.uploader.destroy(img.public_id, resource_type="image")
-                            logger.info(f"Deleted hotel image {img.public_id}: {result}")
-
-        except Exception as cloudinary_error:
-            logger.error(f"Cloudinary deletion failed: {str(cloudinary_error)}")
-            # Continue with database deletion even if Cloudinary fails
+        # Collect image IDs before the ORM objects are deleted
+        public_ids = collect_public_ids(itinerary)
 
         # Delete from database (cascade will handle related records)
         db.delete(itinerary)
         db.commit()
+        invalidate_itinerary_count()
+        invalidate_cached_itinerary(slug)
         logger.info(f"Successfully deleted itinerary '{title}' from database")
 
+        # Remove the images from Cloudinary after the response is sent
+        background_tasks.add_task(delete_cloudinary_images, public_ids)
+
         return {"message": f"Itinerary '{title}' deleted successfully"}
 
     except HTTPException:
@@ -215,6 +272,8 @@ async def delete_itinerary(slug: str, db: db_dependency):
     
 @router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_itinerary(request: ItineraryCreateSchema, db: db_dependency):
+    # The entity tree is attached through relationships and written by
+    # cascade; images follow in one executemany once the owners have IDs
     new_itinerary = Itinerary(
         title=request.title,
         overview=request.overview,
@@ -227,48 +286,46 @@ async def create_itinerary(request: ItineraryCreateSchema, db: db_dependency):
         price=request.price,
         cost_inclusive=request.cost_inclusive,
         cost_exclusive=request.cost_exclusive,
+        tags=[Tag(item=tag.item) for tag in request.tags or []],
     )
-    db.add(new_itinerary)
-    db.flush()
-
-    # Add main itinerary images
-    add_images_with_links(db, request.images, "itinerary", new_itinerary.id)
 
-    # Add itinerary days and their images + hotel details
+    # Add itinerary days and their hotel details
+    days = []
     for day in request.days or []:
         day_obj = ItineraryDay(
             day_number=day.day_number,
             title=day.title,
             description=day.description,
-            itinerary=new_itinerary
         )
-        db.add(day_obj)
-        db.flush()
-        add_images_with_links(db, day.images, "itinerary_day", day_obj.id)
-
         if day.hotel_detail:
-            hotel = HotelDetail(
+            day_obj.hotel_detail = HotelDetail(
                 name=day.hotel_detail.name,
                 url=day.hotel_detail.url,
-                day=day_obj
             )
-            db.add(hotel)
-            db.flush()
-            add_images_with_links(db, day.hotel_detail.images, "hotel_detail", hotel.id)
+        new_itinerary.days.append(day_obj)
+        days.append((day, day_obj))
 
     # Add map (single image)
     if request.map and request.map.image:
-        map_obj = Map(itinerary=new_itinerary)
-        db.add(map_obj)
-        db.flush()
-        add_images_with_links(db, [request.map.image], "map", map_obj.id)
+        new_itinerary.map = Map()
 
-    # Add tags
-    for tag in request.tags or []:
-        tag_obj = Tag(item=tag.item, itinerary=new_itinerary)
-        db.add(tag_obj)
+    db.add(new_itinerary)
+    # Assigns the generated IDs the image rows point at
+    db.flush()
+
+    # Branch on the request, not the relationships: reading an unset
+    # relationship after the flush lazy-loads it with a SELECT
+    images = image_rows(request.images, itinerary_id=new_itinerary.id)
+    for day, day_obj in days:
+        images += image_rows(day.images, itinerary_day_id=day_obj.id)
+        if day.hotel_detail:
+            images += image_rows(day.hotel_detail.images, hotel_detail_id=day_obj.hotel_detail.id)
+    if request.map and request.map.image:
+        images += image_rows([request.map.image], map_id=new_itinerary.map.id)
+    insert_images(db, images)
 
     db.commit()
-    db.refresh(new_itinerary)
+    invalidate_itinerary_count()
+    invalidate_cached_itinerary(new_itinerary.slug)
 
     return {"message": "Itinerary created successfully", "itinerary_id": new_itinerary.id}
@@ -1,63 +1,80 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import Any, List, Optional
+from typing_extensions import TypedDict
+
+# Nested shapes are only ever exposed through ItinerarySchema, so they are
+# plain TypedDicts: each image, day or tag is a dict rather than a model
+# instance, and the builders below read them straight off the ORM objects.
 
 # ----------------------------
 # Image Schema
 # ----------------------------
-class ImageSchema(BaseModel):
-    id: str
+class ImageSchema(TypedDict):
+    id: int
     url: str
     public_id: str
 
-    class Config:
-        from_attributes = True
+def _image(obj) -> ImageSchema:
+    return ImageSchema(id=obj.id, url=obj.url, public_id=obj.public_id)
 
 # ----------------------------
 # Hotel Detail Schema
 # ----------------------------
-class HotelDetailSchema(BaseModel):
+class HotelDetailSchema(TypedDict):
     id: str
     name: str
     url: Optional[str]
-    images: List[ImageSchema] = []
+    images: List[ImageSchema]
 
-    class Config:
-        from_attributes = True
+def _hotel_detail(obj) -> HotelDetailSchema:
+    return HotelDetailSchema(
+        id=obj.id,
+        name=obj.name,
+        url=obj.url,
+        images=[_image(img) for img in obj.images],
+    )
 
 # ----------------------------
 # Itinerary Day Schema
 # ----------------------------
-class ItineraryDaySchema(BaseModel):
+class ItineraryDaySchema(TypedDict):
     id: str
     day_number: int
     title: str
     description: str
-    images: List[ImageSchema] = []
+    images: List[ImageSchema]
     hotel_detail: Optional[HotelDetailSchema]
 
-    class Config:
-        from_attributes = True
+def _itinerary_day(obj) -> ItineraryDaySchema:
+    return ItineraryDaySchema(
+        id=obj.id,
+        day_number=obj.day_number,
+        title=obj.title,
+        description=obj.description,
+        images=[_image(img) for img in obj.images],
+        hotel_detail=_hotel_detail(obj.hotel_detail) if obj.hotel_detail else None,
+    )
 
 # ----------------------------
 # Map Schema
 # ----------------------------
-class MapSchema(BaseModel):
+class MapSchema(TypedDict):
     id: str
-    images: Optional[ImageSchema] = None
+    image: Optional[ImageSchema]
 
-    class Config:
-        from_attributes = True
+def _map(obj) -> MapSchema:
+    return MapSchema(id=obj.id, image=_image(obj.image) if obj.image else None)
 
 # ----------------------------
 # Tag Schema
 # ----------------------------
-class TagSchema(BaseModel):
+class TagSchema(TypedDict):
     id: str
     item: str
 
-    class Config:
-        from_attributes = True
+def _tag(obj) -> TagSchema:
+    return TagSchema(id=obj.id, item=obj.item)
 
 # ----------------------------
 # Itinerary Schema
@@ -74,23 +91,63 @@ class ItinerarySchema(BaseModel):
     location: str
     discount: int
     price: int
-    cost_inclusive: Optional[List[dict]] = []
-    cost_exclusive: Optional[List[dict]] = []
+    # Stored as JSON and passed through as-is; the create schema validates them
+    cost_inclusive: Optional[Any] = None
+    cost_exclusive: Optional[Any] = None
     images: List[ImageSchema] = []
     days: List[ItineraryDaySchema] = []
     map: Optional[MapSchema]
     tags: List[TagSchema] = []
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    @classmethod
+    def from_orm_fast(cls, obj):
+        # Every field comes typed out of the database, so build the model
+        # without validating it again
+        return cls.model_construct(
+            id=obj.id,
+            title=obj.title,
+            overview=obj.overview,
+            slug=obj.slug,
+            duration=obj.duration,
+            arrival_city=obj.arrival_city,
+            departure_city=obj.departure_city,
+            accommodation=obj.accommodation,
+            location=obj.location,
+            discount=obj.discount,
+            price=obj.price,
+            cost_inclusive=obj.cost_inclusive,
+            cost_exclusive=obj.cost_exclusive,
+            images=[_image(img) for img in obj.images],
+            days=[_itinerary_day(day) for day in obj.days],
+            map=_map(obj.map) if obj.map else None,
+            tags=[_tag(tag) for tag in obj.tags],
+            created_at=obj.created_at,
+        )
+
+# ----------------------------
+# Itinerary List Item Schema
+# ----------------------------
+class ItineraryListItemSchema(TypedDict):
+    # Built straight from the list query's row mappings
+    id: str
+    title: str
+    slug: str
+    duration: int
+    location: str
+    price: int
+    discount: int
+    cover_image_url: Optional[str]
+    created_at: datetime
 
 # ----------------------------
 # Response Wrapper
 # ----------------------------
 class ItinerariesResponseSchema(BaseModel):
-    itineraries: List[ItinerarySchema]
+    itineraries: List[ItineraryListItemSchema]
     total: int
+    limit: int
+    offset: int
 
 class ImageCreateSchema(BaseModel):
     url: str
@@ -134,3 +191,7 @@ class ItineraryCreateSchema(BaseModel):
     tags: Optional[List[TagCreateSchema]] = []
     images: Optional[List[ImageCreateSchema]] = []
 
+# Reused by the read endpoints; dump_json returns bytes ready for the
+# response body, without the str round-trip of model_dump_json()
+ITINERARY_ADAPTER = TypeAdapter(ItinerarySchema)
+ITINERARIES_RESPONSE_ADAPTER = TypeAdapter(ItinerariesResponseSchema)
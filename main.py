@@ -1,7 +1,8 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from database import initialize_database
+from fastapi.responses import ORJSONResponse
+from database import initialize_database, optimize_database
 from itinerary import itinerary_router
 from uploads import uploads_router
 
@@ -9,12 +10,14 @@ from uploads import uploads_router
 async def lifespan(app: FastAPI):
     initialize_database()
     yield
+    optimize_database()
 
 app = FastAPI(
     lifespan=lifespan,
     title="Demo Tours Backend",
     description="This is a demo backend for managing tours, itineraries, maps, and images.",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 origins = [
@@ -27,8 +30,10 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Explicit lists let Starlette build the preflight headers once instead
+    # of echoing each request's Access-Control-Request-Headers
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
 )
 
 app.include_router(itinerary_router)
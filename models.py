@@ -1,19 +1,21 @@
 from datetime import datetime
 import re
-import uuid
+import secrets
 from typing import List, Optional
-from sqlalchemy import JSON, Integer, String, ForeignKey, event, and_, DateTime
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, foreign
+from sqlalchemy import JSON, CheckConstraint, Integer, String, ForeignKey, event, DateTime, inspect, text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 def generate_id(prefix: str) -> str:
-    uuid_str = str(uuid.uuid4()).replace("-", "")[:8].upper()
-    return f"{prefix}-{uuid_str}"
+    return f"{prefix}-{secrets.token_hex(4).upper()}"
 
 
+_SLUG_STRIP = re.compile(r"[^\w\s-]")
+_SLUG_DASH = re.compile(r"[-\s]+")
+
 def slugify(value: str) -> str:
     """Converts a string to a URL-safe slug."""
-    value = re.sub(r"[^\w\s-]", "", value).strip().lower()
-    value = re.sub(r"[-\s]+", "-", value)
+    value = _SLUG_STRIP.sub("", value).strip().lower()
+    value = _SLUG_DASH.sub("-", value)
     return value
 
 class Base(DeclarativeBase):
@@ -22,39 +24,53 @@ class Base(DeclarativeBase):
 # --------------------------------------
 # Universal Image Table
 # --------------------------------------
+# Owner columns on images; each image belongs to exactly one owner
+IMAGE_OWNER_COLUMNS = ("itinerary_id", "itinerary_day_id", "map_id", "hotel_detail_id")
+
 class Image(Base):
     __tablename__ = "images"
+    __table_args__ = (
+        CheckConstraint(
+            " + ".join(f"(CASE WHEN {column} IS NOT NULL THEN 1 ELSE 0 END)" for column in IMAGE_OWNER_COLUMNS) + " = 1",
+            name="ck_images_one_owner",
+        ),
+    )
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, index=True, unique=True, default=lambda: generate_id("IMG"))
+    # Integer rowid key: images are only ever addressed through joins
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     url: Mapped[str] = mapped_column(String, nullable=False)
     public_id: Mapped[str] = mapped_column(String, nullable=False)
 
-    # Backref to all links (Itinerary, Map, etc.)
-    links: Mapped[List["ImageLink"]] = relationship("ImageLink", back_populates="image", cascade="all, delete")
-
-
-# --------------------------------------
-# Universal Image Linker (Polymorphic)
-# --------------------------------------
-class ImageLink(Base):
-    __tablename__ = "image_links"
-
-    id: Mapped[str] = mapped_column(String, primary_key=True, index=True, unique=True, default=lambda: generate_id("IMGLNK"))
-    image_id: Mapped[str] = mapped_column(String, ForeignKey("images.id", ondelete="CASCADE"))
-    entity_type: Mapped[str] = mapped_column(String, nullable=False)  # e.g. "itinerary", "map"
-    entity_id: Mapped[str] = mapped_column(String, nullable=False)     # the actual ID of the entity
-
-    image: Mapped["Image"] = relationship("Image", back_populates="links")
+    # Owning entity; ck_images_one_owner requires exactly one of these to be
+    # set. Each owner loads its images with a plain indexed lookup on its own column.
+    itinerary_id: Mapped[Optional[str]] = mapped_column(
+        String, ForeignKey("itineraries.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    itinerary_day_id: Mapped[Optional[str]] = mapped_column(
+        String, ForeignKey("itinerary_days.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    map_id: Mapped[Optional[str]] = mapped_column(
+        String, ForeignKey("maps.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    hotel_detail_id: Mapped[Optional[str]] = mapped_column(
+        String, ForeignKey("hotel_details.id", ondelete="CASCADE"), nullable=True, index=True
+    )
 
 # --------------------------------------
 # Models
 # --------------------------------------
+# Relationships below keep the default lazy loading. Read paths that
+# serialize a whole tree name every relationship they need with
+# joinedload/selectinload and end with raiseload("*"), so a relationship
+# added here must also be added to those loader options (see
+# _load_itinerary_json in itinerary/itinerary.py) or the request fails loudly.
 class Itinerary(Base):
     __tablename__ = "itineraries"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, unique=True, index=True, default=lambda: generate_id("ITI"))
     title: Mapped[str] = mapped_column(String, nullable=False)
-    overview: Mapped[str] = mapped_column(String, nullable=False)
+    # Large text/JSON only the detail view renders; loaded on demand
+    overview: Mapped[str] = mapped_column(String, nullable=False, deferred=True)
     slug: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
     duration: Mapped[int] = mapped_column(Integer, nullable=False)
     arrival_city: Mapped[str] = mapped_column(String, nullable=False)
@@ -62,25 +78,20 @@ class Itinerary(Base):
     accommodation: Mapped[str] = mapped_column(String, nullable=False)
     location: Mapped[str] = mapped_column(String, nullable=False)
     discount: Mapped[int] = mapped_column(Integer, default=0)
-    cost_inclusive: Mapped[List[dict]] = mapped_column(JSON, nullable=True)
-    cost_exclusive: Mapped[List[dict]] = mapped_column(JSON, nullable=True)
+    cost_inclusive: Mapped[List[dict]] = mapped_column(JSON, nullable=True, deferred=True)
+    cost_exclusive: Mapped[List[dict]] = mapped_column(JSON, nullable=True, deferred=True)
     price: Mapped[int] = mapped_column(Integer, nullable=False)
 
-    images: Mapped[List["Image"]] = relationship(
-        "Image",
-        secondary="image_links",
-        primaryjoin=and_(
-            foreign(ImageLink.entity_id) == id,
-            ImageLink.entity_type == 'itinerary'
-        ),
-        secondaryjoin=foreign(ImageLink.image_id) == Image.id,
-        viewonly=True,
-    )
+    images: Mapped[List["Image"]] = relationship("Image", cascade="all, delete-orphan")
     days: Mapped[List["ItineraryDay"]] = relationship("ItineraryDay", back_populates="itinerary", cascade="all, delete-orphan")
     map: Mapped[Optional["Map"]] = relationship("Map", back_populates="itinerary", uselist=False, cascade="all, delete-orphan")
     tags: Mapped[List["Tag"]] = relationship("Tag", back_populates="itinerary", cascade="all, delete-orphan")
 
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    # UTC with millisecond resolution; SQLite's CURRENT_TIMESTAMP only has whole
+    # seconds, which leaves itineraries created together unordered
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=text("(STRFTIME('%Y-%m-%d %H:%M:%f', 'now'))")
+    )
 
 
 # Insert event
@@ -92,7 +103,9 @@ def create_itinerary_slug(mapper, connection, target):
 # Update event
 @event.listens_for(Itinerary, "before_update")
 def update_itinerary_slug(mapper, connection, target):
-    if target.title:
+    # Only reslug when the title itself changed, so unrelated updates
+    # don't rewrite the unique slug column
+    if target.title and inspect(target).attrs.title.history.has_changes():
         target.slug = slugify(target.title)
 
 class Map(Base):
@@ -101,7 +114,7 @@ class Map(Base):
     id: Mapped[str] = mapped_column(String, primary_key=True, unique=True, index=True, default=lambda: generate_id("MAP"))
 
     # Foreign key to link to Itinerary
-    itinerary_id: Mapped[str] = mapped_column(String, ForeignKey("itineraries.id"), nullable=False)
+    itinerary_id: Mapped[str] = mapped_column(String, ForeignKey("itineraries.id"), nullable=False, index=True)
 
     # Bidirectional relationship
     itinerary: Mapped["Itinerary"] = relationship("Itinerary", back_populates="map")
@@ -109,14 +122,8 @@ class Map(Base):
     # Single image relationship
     image: Mapped[Optional["Image"]] = relationship(
         "Image",
-        secondary="image_links",
-        primaryjoin=and_(
-            foreign(ImageLink.entity_id) == id,
-            ImageLink.entity_type == 'map'
-        ),
-        secondaryjoin=foreign(ImageLink.image_id) == Image.id,
         uselist=False,  # Ensures only one image is returned
-        viewonly=True,
+        cascade="all, delete-orphan",
     )
 
 class Tag(Base):
@@ -124,7 +131,7 @@ class Tag(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True, index=True, unique=True, default=lambda: generate_id("TAG"))
     item: Mapped[str] = mapped_column(String, nullable=False)
-    itinerary_id: Mapped[str] = mapped_column(String, ForeignKey("itineraries.id"), nullable=False)
+    itinerary_id: Mapped[str] = mapped_column(String, ForeignKey("itineraries.id"), nullable=False, index=True)
 
     itinerary: Mapped["Itinerary"] = relationship("Itinerary", back_populates="tags")
 
@@ -135,20 +142,11 @@ class ItineraryDay(Base):
     day_number: Mapped[int] = mapped_column(Integer, nullable=False)
     title: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=False)
-    itinerary_id: Mapped[str] = mapped_column(String, ForeignKey("itineraries.id"), nullable=False)
+    itinerary_id: Mapped[str] = mapped_column(String, ForeignKey("itineraries.id"), nullable=False, index=True)
 
     itinerary: Mapped["Itinerary"] = relationship("Itinerary", back_populates="days")
 
-    images: Mapped[List["Image"]] = relationship(
-        "Image",
-        secondary="image_links",
-        primaryjoin=and_(
-            foreign(ImageLink.entity_id) == id,
-            ImageLink.entity_type == 'itinerary_day'
-        ),
-        secondaryjoin=foreign(ImageLink.image_id) == Image.id,
-        viewonly=True,
-    )
+    images: Mapped[List["Image"]] = relationship("Image", cascade="all, delete-orphan")
 
     hotel_detail: Mapped[Optional["HotelDetail"]] = relationship(
         "HotelDetail", back_populates="day", uselist=False, cascade="all, delete-orphan"
@@ -161,18 +159,9 @@ class HotelDetail(Base):
     id: Mapped[str] = mapped_column(String, primary_key=True, index=True, unique=True, default=lambda: generate_id("HOTEL"))
     name: Mapped[str] = mapped_column(String, nullable=False)
     url: Mapped[str] = mapped_column(String, nullable=True)
-    day_id: Mapped[str] = mapped_column(String, ForeignKey("itinerary_days.id"), nullable=True)
+    day_id: Mapped[str] = mapped_column(String, ForeignKey("itinerary_days.id"), nullable=True, index=True)
 
     day: Mapped[Optional["ItineraryDay"]] = relationship("ItineraryDay", back_populates="hotel_detail")
 
-    images: Mapped[List["Image"]] = relationship(
-        "Image",
-        secondary="image_links",
-        primaryjoin=and_(
-            foreign(ImageLink.entity_id) == id,
-            ImageLink.entity_type == 'hotel_detail'
-        ),
-        secondaryjoin=foreign(ImageLink.image_id) == Image.id,
-        viewonly=True,
-    )
+    images: Mapped[List["Image"]] = relationship("Image", cascade="all, delete-orphan")
 
@@ -1,15 +1,55 @@
 # routes/uploads.py
 from fastapi import APIRouter
-from datetime import datetime
+import hashlib
 import os
-import cloudinary
-import cloudinary.utils
+import time
+from functools import lru_cache
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 from uploads.schema import SignatureResponseSchema
 
 load_dotenv()
 
+# Credentials are fixed for the life of the process, so read them once
+_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
+_API_KEY = os.getenv("CLOUDINARY_API_KEY")
+_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
+
+UPLOAD_FOLDER = "itineraries"
+
+# Everything in the response except the timestamp and its signature
+_STATIC_SIGNATURE_FIELDS = {
+    "cloud_name": _CLOUD_NAME,
+    "api_key": _API_KEY,
+    "folder": UPLOAD_FOLDER,
+    "resource_type": "image",
+}
+
+# Cloudinary signs the sorted "key=value&..." string followed by the API
+# secret with SHA-1. Only the timestamp varies here, so hash the constant
+# prefix once and copy that state for each request.
+_SIGNATURE_PREFIX_HASH = hashlib.sha1(f"folder={UPLOAD_FOLDER}&timestamp=".encode())
+_API_SECRET_BYTES = (_API_SECRET or "").encode()
+
+def sign_upload(timestamp: int) -> str:
+    """
+    Return the Cloudinary signature for an upload to UPLOAD_FOLDER at timestamp.
+    """
+    digest = _SIGNATURE_PREFIX_HASH.copy()
+    digest.update(str(timestamp).encode())
+    digest.update(_API_SECRET_BYTES)
+    return digest.hexdigest()
+
+# Timestamps have one-second resolution, so every request within the same
+# second shares one response; a few entries cover requests straddling a tick.
+# The cached entry is read-only and callers get their own copy of it.
+@lru_cache(maxsize=4)
+def _signature_response(timestamp: int) -> MappingProxyType:
+    return MappingProxyType(
+        {**_STATIC_SIGNATURE_FIELDS, "timestamp": timestamp, "signature": sign_upload(timestamp)}
+    )
+
 router = APIRouter(prefix="/uploads", tags=["Uploads"])
 
 @router.get("/signature", response_model=SignatureResponseSchema)
@@ -18,23 +58,4 @@ async def get_upload_signature():
     Generates a signed upload signature for Cloudinary without using an upload preset.
     You can specify folder and transformations directly.
     """
-    timestamp = int(datetime.now().timestamp())
-
-    params_to_sign = {
-        "timestamp": timestamp,
-        "folder": "itineraries",                     
-    }
-
-    signature = cloudinary.utils.api_sign_request(
-        params_to_sign,
-        os.getenv("CLOUDINARY_API_SECRET")
-    )
-
-    return {
-        "cloud_name": os.getenv("CLOUDINARY_CLOUD_NAME"),
-        "api_key": os.getenv("CLOUDINARY_API_KEY"),
-        "timestamp": timestamp,
-        "signature": signature,
-        "folder": "itineraries",
-        "resource_type": "image"
-    }
\ No newline at end of file
+    return dict(_signature_response(int(time.time())))